@@ -8,16 +8,26 @@ class BaseClient:
 
         :param config_file: Config file path.
         """
-        self.loop = None
 
     def run_task(self, task, *args, **kwargs):
         """
-        Run a given task injecting client as first parameter.
+        Run a given task injecting client as first parameter. Client is closed once the task finishes, so resources
+        bound to the event loop used to run it are not reused by later tasks.
 
         :param task: Task to be executed.
         :param args: Task args.
         :param kwargs: Task kwargs.
         :return:
         """
-        self.loop = asyncio.get_event_loop()
-        return self.loop.run_until_complete(asyncio.ensure_future(task(self, *args, **kwargs), loop=self.loop))
+        async def run():
+            try:
+                return await task(self, *args, **kwargs)
+            finally:
+                await self.close()
+
+        return asyncio.run(run())
+
+    async def close(self):
+        """
+        Release client resources.
+        """
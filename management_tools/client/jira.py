@@ -2,22 +2,56 @@
 """
 Jira Connector.
 """
+import asyncio
 import json
 import logging
+from collections import OrderedDict, deque
 from enum import Enum
+from itertools import islice
 from typing import Dict, Union, List, Tuple, Any, Sequence, Callable, AsyncIterable
 from urllib import parse
 
-import requests
+import httpx
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from management_tools.client.base import BaseClient
-from management_tools.exceptions import ImproperlyConfigured, LoginException
+from management_tools.exceptions import ImproperlyConfigured, InvalidResponseException, LoginException
 
 __all__ = ['Resource', 'Client']
 
 logger = logging.getLogger(__name__)
 
 
+def _json_dumps(obj: Any) -> bytes:
+    """
+    Encode an object as JSON, using orjson when available.
+
+    :param obj: Object to encode.
+    :return: Encoded JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+
+    return json.dumps(obj).encode('utf-8')
+
+
+def _json_loads(content: bytes) -> Any:
+    """
+    Decode a JSON document, using orjson when available.
+
+    :param content: Encoded JSON.
+    :return: Decoded object.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+
+    return json.loads(content)
+
+
 class Resource(Enum):
     LOGIN = 'auth/1/session'
     SEARCH = 'api/2/search'
@@ -26,6 +60,10 @@ class Resource(Enum):
 
 class Client(BaseClient):
     MAX_TRIES = 5
+    MAX_CONCURRENT_REQUESTS = 8
+    TIMEOUT = 60.0
+    ETAG_CACHE_MAX_BYTES = 4 * 1024 * 1024
+    HTTP_METHODS = {'get': 'GET', 'post': 'POST', 'put': 'PUT', 'delete': 'DELETE'}
 
     def __init__(self, username: str, password: str, url: str, *args, **kwargs):
         """
@@ -49,11 +87,47 @@ class Client(BaseClient):
         except:
             raise ImproperlyConfigured('Wrong url')
 
-        with requests.Session() as s:
-            self._session = s
+        self._session = None
+        self._etag_cache = OrderedDict()
+        self._etag_cache_bytes = 0
+
+    def _get_session(self) -> httpx.AsyncClient:
+        """
+        Get http session, creating it if needed. Session is created lazily so it is bound to the running event loop.
+
+        :return: Http session.
+        """
+        if self._session is None:
+            # Concurrent requests are multiplexed over a single HTTP/2 connection when server supports it
+            limits = httpx.Limits(max_connections=self.MAX_CONCURRENT_REQUESTS)
+            self._session = httpx.AsyncClient(http2=True, timeout=self.TIMEOUT, limits=limits)
+
+        return self._session
+
+    def _cache_response(self, cache_key: Tuple, etag: str, content: bytes):
+        """
+        Store a response body in ETag cache, evicting least recently used bodies to keep the cache under
+        ETAG_CACHE_MAX_BYTES. Bodies bigger than that limit are not cached.
+
+        :param cache_key: Request key.
+        :param etag: Response ETag.
+        :param content: Response body.
+        """
+        previous = self._etag_cache.pop(cache_key, None)
+        if previous is not None:
+            self._etag_cache_bytes -= len(previous[1])
+
+        if len(content) > self.ETAG_CACHE_MAX_BYTES:
+            return
+
+        self._etag_cache[cache_key] = (etag, content)
+        self._etag_cache_bytes += len(content)
+        while self._etag_cache_bytes > self.ETAG_CACHE_MAX_BYTES:
+            _, (_, evicted) = self._etag_cache.popitem(last=False)
+            self._etag_cache_bytes -= len(evicted)
 
     async def request(self, resource: str, method: str = 'get', params: Dict[str, str] = None,
-                      data: Dict[str, str] = None, headers: Dict[str, str] = None,
+                      data: Union[str, bytes] = None, headers: Dict[str, str] = None,
                       cookies: Dict[str, str] = None) -> Union[Dict[str, Any], List]:
         """
         Convenience method to do requests.
@@ -61,16 +135,36 @@ class Client(BaseClient):
         :param resource: Jira resource.
         :param method: Http method.
         :param params: Http params.
-        :param data: Data to be sent.
+        :param data: Raw request body, already encoded.
         :param headers: Http headers.
-        :param cookies: Http cookies.
+        :param cookies: Http cookies, stored in session cookie jar.
         :return: Json response.
         """
-        url = parse.urljoin(base=self._base_url, url=resource)
-
-        request_function = getattr(self._session, method, lambda *args, **kwargs: None)
+        # Base url always ends with a slash and resources are relative paths, so there is no need to join them
+        url = self._base_url + resource
 
-        response = request_function(url, params=params, data=data, headers=headers, cookies=cookies)
+        try:
+            http_method = self.HTTP_METHODS[method]
+        except KeyError:
+            raise ValueError('Unsupported http method: {}'.format(method))
+
+        # Responses to GET requests (worklogs) are revalidated using their ETag, so unchanged resources are not
+        # transferred again while this client lives. Searches are POST requests and are never cached. Raw bodies are
+        # kept in a LRU cache bounded by size and decoded on every hit, so callers always get their own objects.
+        cache_key = None
+        cached = None
+        if http_method == 'GET':
+            cache_key = (url, tuple(sorted(params.items())) if params else None)
+            cached = self._etag_cache.get(cache_key)
+            if cached is not None:
+                self._etag_cache.move_to_end(cache_key)
+                headers = dict(headers or {}, **{'if-none-match': cached[0]})
+
+        session = self._get_session()
+        if cookies is not None:
+            session.cookies.update(cookies)
+
+        response = await session.request(http_method, url, params=params, content=data, headers=headers)
 
         logger.info('Response %s from %s.', response.status_code, url)
         logger.debug('Request parameters: %s', str(params))
@@ -78,7 +172,15 @@ class Client(BaseClient):
         logger.debug('Request headers: %s', str(headers))
         logger.debug('Request cookies: %s', str(cookies))
 
-        return response.json() if response._content else None
+        if cached is not None and response.status_code == 304:
+            content = cached[1]
+        else:
+            content = response.content
+
+            if cache_key is not None and 'etag' in response.headers:
+                self._cache_response(cache_key, response.headers['etag'], content)
+
+        return _json_loads(content) if content else None
 
     async def login(self) -> Tuple[str, str]:
         """
@@ -92,7 +194,7 @@ class Client(BaseClient):
 
             while not session:
                 # Prepare request
-                body = json.dumps({'username': self._username, 'password': self._password})
+                body = _json_dumps({'username': self._username, 'password': self._password})
                 headers = {'content-type': 'application/json'}
                 response = await self.request(resource=Resource.LOGIN.value, method='post', data=body, headers=headers)
 
@@ -140,37 +242,89 @@ class Client(BaseClient):
         if expand is not None:
             data['expand'] = expand
 
-        body = json.dumps(data)
+        body = _json_dumps(data)
         headers = {'content-type': 'application/json'}
         return await self.request(resource=Resource.SEARCH.value, method='post', data=body, headers=headers)
 
     async def search(self, jql: str, fields: Sequence[str] = None,
-                     transform: Callable[[Dict[str, Any]], Dict[str, Any]] = lambda x: x,
+                     transform: Callable[[Dict[str, Any]], Dict[str, Any]] = lambda x: x, batch_size: int = 1000,
                      **kwargs) -> AsyncIterable[Dict[str, Any]]:
         """
-        Search issues using JQL, iterating over paginated responses and composing a full list of items.
+        Search issues using JQL, streaming them in order as paginated responses arrive.
+
+        Pages are fetched concurrently, but only a bounded window of pages is requested ahead of the consumer, so no
+        full list of issues is built.
 
         :param jql: JQL.
         :param transform: Function to transform data from retrieved JSON.
         :param fields: Tasks fields.
+        :param batch_size: Number of results requested per page. Server may cap it to a lower value.
         :param kwargs: Query format args.
         :return: Tasks.
+        :raise InvalidResponseException: If a page other than the first one is not a valid search response.
         """
-        tasks = await self._search(jql, fields=fields)
+        tasks = await self._search(jql, max_results=batch_size, fields=fields)
 
         try:
             total = int(tasks['total'])
             start_at = int(tasks['startAt'])
             max_results = int(tasks['maxResults'])
+        except KeyError:
+            logger.error('Invalid response: %s', str(tasks))
+            return
+
+        # Server may return less issues than requested, so actual page length is used to paginate
+        page_size = min(max_results, len(tasks.get('issues', []))) or max_results
+
+        offsets = iter(range(start_at + page_size, total, page_size) if page_size > 0 else ())
+
+        def search_page(page_start_at):
+            return page_start_at, asyncio.ensure_future(
+                self._search(jql, start_at=page_start_at, max_results=page_size, fields=fields))
 
-            while start_at < total:
-                for task in tasks.get('issues', []):
+        def page_issues(page):
+            try:
+                return page['issues']
+            except (KeyError, TypeError):
+                logger.error('Invalid response: %s', str(page))
+                raise InvalidResponseException('Invalid response, search results are incomplete')
+
+        # Once total is known, remaining pages are fetched concurrently but only a bounded window of pages is
+        # requested ahead of the consumer, so at most MAX_CONCURRENT_REQUESTS pages are kept in memory
+        page_futures = deque(search_page(i) for i in islice(offsets, self.MAX_CONCURRENT_REQUESTS))
+
+        try:
+            # First page issues are popped so they can be released once consumed, like the rest of the pages
+            for task in tasks.pop('issues', []):
+                yield transform(task)
+
+            while page_futures:
+                page_start_at, page_future = page_futures.popleft()
+                page = await page_future
+                page_futures.extend(search_page(i) for i in islice(offsets, 1))
+
+                issues = page_issues(page)
+                for task in issues:
                     yield transform(task)
 
-                start_at += max_results + 1
-                tasks = await self._search(jql, start_at=start_at, max_results=max_results, fields=fields)
-        except KeyError:
-            logger.error('Invalid response: %s', str(tasks))
+                # Server may return less issues than requested for any page, so missing ones are requested again
+                expected = min(page_size, total - page_start_at)
+                fetched = len(issues)
+                while fetched < expected:
+                    issues = page_issues(await self._search(
+                        jql, start_at=page_start_at + fetched, max_results=expected - fetched, fields=fields))
+                    if not issues:
+                        logger.warning('Search results are incomplete, missing issues from %d to %d',
+                                       page_start_at + fetched, page_start_at + expected - 1)
+                        break
+
+                    fetched += len(issues)
+                    for task in issues:
+                        yield transform(task)
+        finally:
+            for _, page_future in page_futures:
+                page_future.cancel()
+            await asyncio.gather(*(page_future for _, page_future in page_futures), return_exceptions=True)
 
     async def worklogs(self, date_from: 'datetime.datetime', date_to: 'datetime.datetime', username: str,
                        project_key: str = None) -> List[Any]:
@@ -198,5 +352,14 @@ class Client(BaseClient):
         await self.login()
         return self
 
+    async def close(self):
+        """
+        Close http session and its pooled connections.
+        """
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.logout()
+        await self.close()
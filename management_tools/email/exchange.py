@@ -17,8 +17,8 @@ class ExchangeMail(Mail):
 
     def _attach(self, message: Message, attachments: Dict[str, str]):
         for name, attachment in attachments.items():
-            with open(attachment) as f:
-                message.attach(FileAttachment(name=name, content=f.read().encode('utf-8')))
+            with open(attachment, 'rb') as f:
+                message.attach(FileAttachment(name=name, content=f.read()))
 
     def send_email(self, to: List[str], body: str = None, subject: str = None, attachments: Dict[str, str] = None,
                    save: bool = True, **kwargs):
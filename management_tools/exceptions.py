@@ -4,3 +4,7 @@ class ImproperlyConfigured(Exception):
 
 class LoginException(Exception):
     pass
+
+
+class InvalidResponseException(Exception):
+    pass
@@ -5,8 +5,8 @@ import logging
 import shlex
 import sys
 
-import nose
 import prospector.run as prospector
+import pytest
 
 __all__ = ['RunTests', 'main']
 
@@ -39,10 +39,9 @@ class RunTests:
         return {k: v for k, v in vars(parser.parse_args()).items()}
 
     def tests(self):
-        argv = ['nosetests'] + self.test_module + self.test_args
+        argv = self.test_module + self.test_args
         try:
-            result = nose.run(argv=argv)
-            result = (result + 1) % 2  # Change 0 to 1 and 1 to 0
+            result = int(pytest.main(argv))
         except:
             self.logger.exception('Tests failed')
             result = 1
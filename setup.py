@@ -4,8 +4,6 @@ import os
 import shutil
 import sys
 
-from pip.download import PipSession
-from pip.req import parse_requirements as requirements
 from setuptools import Command, setup
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -15,7 +13,15 @@ if sys.version_info[0] == 2:
 
 
 def parse_requirements(f):
-    return [str(r.req) for r in requirements(f, session=PipSession())]
+    requirements = []
+    with open(f) as requirements_file:
+        for line in (i.strip() for i in requirements_file):
+            if line.startswith('-r'):
+                requirements += parse_requirements(os.path.join(os.path.dirname(f), line[2:].strip()))
+            elif line and not line.startswith('#'):
+                requirements.append(line)
+
+    return requirements
 
 
 class Dist(Command):
@@ -73,8 +79,11 @@ _CLASSIFIERS = (
     'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
     'Natural Language :: English',
     'Programming Language :: Python',
-    'Programming Language :: Python :: 3.5',
-    'Programming Language :: Python :: 3.6',
+    'Programming Language :: Python :: 3.8',
+    'Programming Language :: Python :: 3.9',
+    'Programming Language :: Python :: 3.10',
+    'Programming Language :: Python :: 3.11',
+    'Programming Language :: Python :: 3.12',
     'Topic :: Software Development :: Libraries :: Python Modules',
 )
 
@@ -103,9 +112,13 @@ setup(
         'management_tools',
     ],
     include_package_data=True,
+    python_requires='>=3.8',
     install_requires=_REQUIRES,
     tests_require=_TESTS_REQUIRES,
     extras_require={
+        'orjson': [
+            'orjson',
+        ],
         'dev': [
             'setuptools',
             'pip',
@@ -119,7 +132,6 @@ setup(
     zip_safe=False,
     keywords=_KEYWORDS,
     classifiers=_CLASSIFIERS,
-    test_suite='nose.collector',
     cmdclass={
         'test': Test,
         'dist': Dist,
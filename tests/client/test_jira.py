@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import datetime
+import importlib
+import json
+import sys
+import unittest
+import warnings
+from unittest import mock
+
+import httpx
+
+from management_tools.client import jira
+from management_tools.exceptions import InvalidResponseException, LoginException
+
+
+class FakeJira:
+    """
+    Fake Jira search server that caps page size and records requested pages.
+    """
+
+    def __init__(self, total: int, cap: int = 50, failing_start_at: int = None, responses: dict = None,
+                 short_pages: dict = None):
+        self.total = total
+        self.cap = cap
+        self.failing_start_at = failing_start_at
+        self.responses = responses or {}
+        self.short_pages = short_pages or {}
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        start_at = body['startAt']
+        max_results = min(body['maxResults'], self.cap, self.short_pages.pop(start_at, self.cap))
+        self.requests.append((start_at, body['maxResults']))
+
+        if start_at == self.failing_start_at:
+            raise httpx.ConnectError('Connection lost', request=request)
+
+        if start_at in self.responses:
+            return self.responses[start_at]
+
+        issues = [{'key': 'ISSUE-{}'.format(i)} for i in range(start_at, min(start_at + max_results, self.total))]
+        return httpx.Response(200, json={
+            'total': self.total,
+            'startAt': start_at,
+            'maxResults': max_results,
+            'issues': issues,
+        })
+
+
+class JsonTestCase(unittest.TestCase):
+    def test_json(self):
+        self.assertEqual(jira._json_loads(jira._json_dumps({'foo': ['bar']})), {'foo': ['bar']})
+        self.assertIsInstance(jira._json_dumps({'foo': ['bar']}), bytes)
+
+    def test_json_without_orjson(self):
+        try:
+            with mock.patch.dict(sys.modules, {'orjson': None}):
+                importlib.reload(jira)
+
+                self.assertIsNone(jira.orjson)
+                self.assertEqual(jira._json_dumps({'foo': ['bar']}), b'{"foo": ["bar"]}')
+                self.assertEqual(jira._json_loads(b'{"foo": ["bar"]}'), {'foo': ['bar']})
+        finally:
+            importlib.reload(jira)
+
+
+class ClientTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = jira.Client(username='foo', password='bar', url='https://jira.example.com')
+
+    def mock(self, handler):
+        self.client._session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    def search(self, server, **kwargs):
+        self.mock(server)
+
+        async def search():
+            return [i['key'] async for i in self.client.search('project = FOO', **kwargs)]
+
+        return asyncio.run(search())
+
+    def test_search_no_results(self):
+        server = FakeJira(total=0)
+
+        self.assertEqual(self.search(server), [])
+        self.assertEqual(server.requests, [(0, 1000)])
+
+    def test_search_total_lower_than_cap(self):
+        server = FakeJira(total=30)
+
+        self.assertEqual(self.search(server), ['ISSUE-{}'.format(i) for i in range(30)])
+        self.assertEqual(server.requests, [(0, 1000)])
+
+    def test_search_server_cap_lower_than_batch_size(self):
+        server = FakeJira(total=237, cap=50)
+
+        self.assertEqual(self.search(server, batch_size=100), ['ISSUE-{}'.format(i) for i in range(237)])
+        self.assertEqual(sorted(server.requests), [(0, 100), (50, 50), (100, 50), (150, 50), (200, 50)])
+
+    def test_search_total_multiple_of_page_size(self):
+        server = FakeJira(total=200, cap=50)
+
+        self.assertEqual(self.search(server), ['ISSUE-{}'.format(i) for i in range(200)])
+        self.assertEqual(sorted(s for s, _ in server.requests), [0, 50, 100, 150])
+
+    def test_search_fields(self):
+        requested_fields = []
+
+        def handler(request):
+            requested_fields.append(json.loads(request.content)['fields'])
+            return httpx.Response(200, json={'total': 0, 'startAt': 0, 'maxResults': 1000, 'issues': []})
+
+        self.mock(handler)
+
+        async def search():
+            return [i async for i in self.client.search('project = FOO', fields=['summary'])]
+
+        self.assertEqual(asyncio.run(search()), [])
+        self.assertEqual(requested_fields, [['summary']])
+
+    def test_search_short_page(self):
+        server = FakeJira(total=237, cap=50, short_pages={100: 30})
+
+        self.assertEqual(self.search(server), ['ISSUE-{}'.format(i) for i in range(237)])
+        self.assertIn((130, 20), server.requests)
+
+    def test_search_missing_issues(self):
+        server = FakeJira(total=237, cap=50, responses={
+            100: httpx.Response(200, json={'total': 237, 'startAt': 100, 'maxResults': 50, 'issues': [
+                {'key': 'ISSUE-{}'.format(i)} for i in range(100, 130)
+            ]}),
+            130: httpx.Response(200, json={'total': 237, 'startAt': 130, 'maxResults': 20, 'issues': []}),
+        })
+
+        with self.assertLogs('management_tools.client.jira', level='WARNING') as logs:
+            keys = self.search(server)
+
+        self.assertEqual(keys, ['ISSUE-{}'.format(i) for i in range(237) if not 130 <= i < 150])
+        self.assertIn('missing issues from 130 to 149', logs.output[0])
+
+    def test_search_transform(self):
+        server = FakeJira(total=3)
+        self.mock(server)
+
+        async def search():
+            return [i async for i in self.client.search('project = FOO', transform=lambda x: x['key'].lower())]
+
+        self.assertEqual(asyncio.run(search()), ['issue-0', 'issue-1', 'issue-2'])
+
+    def test_search_failing_page(self):
+        server = FakeJira(total=500, cap=50, failing_start_at=200)
+        self.mock(server)
+        keys = []
+
+        async def search():
+            async for i in self.client.search('project = FOO'):
+                keys.append(i['key'])
+
+        with self.assertRaises(httpx.ConnectError):
+            asyncio.run(search())
+
+        self.assertEqual(keys, ['ISSUE-{}'.format(i) for i in range(200)])
+
+    def test_search_invalid_page(self):
+        for response in (httpx.Response(400, json={'errorMessages': ['Wrong JQL']}), httpx.Response(204)):
+            server = FakeJira(total=200, cap=50, responses={100: response})
+            self.mock(server)
+            keys = []
+
+            async def search():
+                async for i in self.client.search('project = FOO'):
+                    keys.append(i['key'])
+
+            with self.assertRaises(InvalidResponseException):
+                asyncio.run(search())
+
+            self.assertEqual(keys, ['ISSUE-{}'.format(i) for i in range(100)])
+
+    def test_search_bounded_prefetch(self):
+        server = FakeJira(total=2000, cap=100)
+        self.mock(server)
+
+        async def search():
+            results = self.client.search('project = FOO')
+            await results.__anext__()
+            for _ in range(10):
+                await asyncio.sleep(0)
+            await results.aclose()
+
+        asyncio.run(search())
+
+        self.assertEqual(len(server.requests), 1 + jira.Client.MAX_CONCURRENT_REQUESTS)
+
+    def test_search_invalid_response(self):
+        self.mock(lambda request: httpx.Response(200, json={'errorMessages': ['Wrong JQL']}))
+
+        async def search():
+            return [i async for i in self.client.search('project = FOO')]
+
+        self.assertEqual(asyncio.run(search()), [])
+
+    def test_request_unsupported_method(self):
+        self.mock(lambda request: httpx.Response(200))
+
+        with self.assertRaises(ValueError):
+            asyncio.run(self.client.request('foo', method='patch'))
+
+    def test_request_empty_response(self):
+        self.mock(lambda request: httpx.Response(204))
+
+        self.assertIsNone(asyncio.run(self.client.request('foo', method='delete')))
+
+    def test_request_cookies(self):
+        sent_cookies = []
+
+        def handler(request):
+            sent_cookies.append(request.headers.get('cookie'))
+            return httpx.Response(200, json={})
+
+        self.mock(handler)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            asyncio.run(self.client.request('foo', cookies={'JSESSIONID': 'bar'}))
+
+        self.assertEqual(sent_cookies, ['JSESSIONID=bar'])
+
+    def test_request_etag(self):
+        if_none_match = []
+
+        def handler(request):
+            if_none_match.append(request.headers.get('if-none-match'))
+            if request.headers.get('if-none-match') == '"foo"':
+                return httpx.Response(304, headers={'etag': '"foo"'})
+            return httpx.Response(200, json=[{'timeSpentSeconds': 3600}], headers={'etag': '"foo"'})
+
+        self.mock(handler)
+        date = datetime.datetime(2017, 3, 10)
+
+        async def worklogs():
+            return await self.client.worklogs(date, date, 'foo'), await self.client.worklogs(date, date, 'foo')
+
+        first, second = asyncio.run(worklogs())
+
+        self.assertEqual(if_none_match, [None, '"foo"'])
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+    def test_request_etag_cache_size(self):
+        self.client.ETAG_CACHE_MAX_BYTES = 10
+        self.mock(lambda request: httpx.Response(
+            200, content=b'[1, 2]' if request.url.params['username'] != 'big' else b'[1, 2, 3, 4, 5]',
+            headers={'etag': '"foo"'}))
+        date = datetime.datetime(2017, 3, 10)
+
+        async def worklogs():
+            for username in ('foo', 'bar', 'foobar', 'bar', 'big'):
+                await self.client.worklogs(date, date, username, project_key='FOO')
+
+        asyncio.run(worklogs())
+
+        self.assertEqual([dict(k[1])['username'] for k in self.client._etag_cache], ['bar'])
+        self.assertEqual(self.client._etag_cache_bytes, 6)
+
+    def test_login(self):
+        self.mock(lambda request: httpx.Response(200, json={'session': {'name': 'JSESSIONID', 'value': 'foo'}}))
+
+        self.assertEqual(asyncio.run(self.client.login()), ('JSESSIONID', 'foo'))
+
+    def test_login_wrong_credentials(self):
+        self.mock(lambda request: httpx.Response(401, json={'errorMessages': ['Login failed']}))
+
+        with self.assertRaises(LoginException):
+            asyncio.run(self.client.login())
+
+    def test_login_retries(self):
+        server_requests = []
+
+        def handler(request):
+            server_requests.append(request)
+            return httpx.Response(200, json={'session': {}})
+
+        self.mock(handler)
+
+        with self.assertRaises(LoginException):
+            asyncio.run(self.client.login())
+
+        self.assertEqual(len(server_requests), jira.Client.MAX_TRIES)
+
+    def test_session(self):
+        async def session():
+            first, second = self.client._get_session(), self.client._get_session()
+            await self.client.close()
+            return first, second
+
+        first, second = asyncio.run(session())
+
+        self.assertIsInstance(first, httpx.AsyncClient)
+        self.assertIs(first, second)
+        self.assertIsNone(self.client._session)
+
+    def test_context_manager_closes_session(self):
+        self.mock(lambda request: httpx.Response(200, json={'session': {'name': 'JSESSIONID', 'value': 'foo'}}))
+
+        async def task():
+            async with self.client as client:
+                return client
+
+        self.assertIs(asyncio.run(task()), self.client)
+        self.assertIsNone(self.client._session)
+
+    def test_run_task_closes_session(self):
+        self.mock(lambda request: httpx.Response(200, json={}))
+
+        async def task(client):
+            return await client.request('foo')
+
+        self.assertEqual(self.client.run_task(task), {})
+        self.assertIsNone(self.client._session)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from management_tools.email.exchange import ExchangeMail
+
+
+class ExchangeMailTestCase(unittest.TestCase):
+    def setUp(self):
+        patchers = [mock.patch('management_tools.email.exchange.{}'.format(name))
+                    for name in ('Credentials', 'Configuration', 'Account', 'Message', 'FileAttachment')]
+        self.mocks = {p.attribute: p.start() for p in patchers}
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+        self.mail = ExchangeMail(username='foo', password='bar', address='foo@example.com',
+                                 ews_url='https://mail.example.com/EWS/Exchange.asmx', ews_auth_type='NTLM')
+
+    def test_send_email_binary_attachment(self):
+        content = b'%PDF-1.4\n\xff\xd8\xe2\xe3\xcf\xd3\n'
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.pdf')
+            with open(path, 'wb') as f:
+                f.write(content)
+
+            self.mail.send_email(to=['bar@example.com'], body='Body', subject='Subject',
+                                 attachments={'report.pdf': path})
+
+        self.mocks['FileAttachment'].assert_called_once_with(name='report.pdf', content=content)
+        message = self.mocks['Message'].return_value
+        message.attach.assert_called_once_with(self.mocks['FileAttachment'].return_value)
+        message.send_and_save.assert_called_once_with()
+        self.assertEqual(self.mocks['Message'].call_args[1]['folder'], self.mail.account.sent)
+
+    def test_send_email_without_saving(self):
+        self.mail.send_email(to=['bar@example.com'], body='Body', subject='Subject', attachments={}, save=False)
+
+        message = self.mocks['Message'].return_value
+        message.send.assert_called_once_with()
+        message.send_and_save.assert_not_called()
+        self.assertNotIn('folder', self.mocks['Message'].call_args[1])